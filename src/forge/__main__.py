@@ -2,9 +2,11 @@ from __future__ import annotations
 
 import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from forge import logger
+from forge.build import fetch_source
 from forge.cross import CrossVEnv
 from forge.package import Package
 from forge.pypi import get_pypi_versions
@@ -183,8 +185,7 @@ def main():
     else:
         build_targets = args.build_targets
 
-    successes = []
-    failures = []
+    builds = []
     for build_target in build_targets:
         if Path(build_target).is_dir():
             # If the build target is a directory, just build what it says.
@@ -226,28 +227,58 @@ def main():
                 build_number=build_number,
             )
 
-            # First build of each version must be clean;
-            # subsequent builds will be isolated by
-
-            first = True
             # Packages that generate -py3-none-any wheels only need to be built on a single platform.
             if package_name_or_recipe in py_any_targets:
                 build_platforms = platforms[:1]
             else:
                 build_platforms = platforms
 
-            # Build the package for each required platform.
-            for sdk, sdk_version, arch in build_platforms:
-                cross_venv = CrossVEnv(sdk=sdk, sdk_version=sdk_version, arch=arch)
-                builder = package.builder(cross_venv)
-                success = builder.build(clean=first)
+            builds.append(
+                (
+                    package_name_or_recipe,
+                    version,
+                    [
+                        package.builder(
+                            CrossVEnv(sdk=sdk, sdk_version=sdk_version, arch=arch)
+                        )
+                        for sdk, sdk_version, arch in build_platforms
+                    ],
+                )
+            )
+
+    # Fetch all the source archives up front. Downloads are network bound, so
+    # the archives for independent packages can be downloaded concurrently,
+    # rather than stalling each build while its source downloads.
+    fetchable = {}
+    for _, _, builders in builds:
+        for builder in builders:
+            fetchable.setdefault(builder.source_archive_path, builder)
+    if fetchable:
+        with ThreadPoolExecutor(max_workers=min(8, len(fetchable))) as executor:
+            list(executor.map(fetch_source, fetchable.values()))
 
-                # If the build was successful, subsequent passes don't need to be clean.
-                if success:
-                    first = False
-                    successes.append((package_name_or_recipe, version, cross_venv.tag))
-                else:
-                    failures.append((package_name_or_recipe, version, cross_venv.tag))
+    successes = []
+    failures = []
+    for package_name_or_recipe, version, builders in builds:
+        # First build of each version must be clean;
+        # subsequent builds will be isolated by
+
+        first = True
+
+        # Build the package for each required platform.
+        for builder in builders:
+            success = builder.build(clean=first)
+
+            # If the build was successful, subsequent passes don't need to be clean.
+            if success:
+                first = False
+                successes.append(
+                    (package_name_or_recipe, version, builder.cross_venv.tag)
+                )
+            else:
+                failures.append(
+                    (package_name_or_recipe, version, builder.cross_venv.tag)
+                )
 
     if successes:
         print()
@@ -1,19 +1,22 @@
 from __future__ import annotations
 
+import hashlib
+import mmap
 import multiprocessing
 import os
 import re
 import shutil
 import sys
 import tarfile
+import threading
 import zipfile
 from abc import ABC, abstractmethod, abstractproperty
-from email import generator, message
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from pathlib import Path
 from typing import TYPE_CHECKING
 
 import httpx
-from packaging.utils import canonicalize_name, canonicalize_version
 
 from forge import subprocess
 from forge.logger import log, log_exception
@@ -30,10 +33,36 @@ if TYPE_CHECKING:
     from forge.package import Package
 
 
+# A single shared HTTP client, so that downloads in one forge run reuse pooled
+# connections (and their TLS sessions) rather than performing a fresh TCP+TLS
+# handshake per download. PyPI serves almost every sdist from the same host.
+_http_client = httpx.Client(
+    follow_redirects=True,
+    limits=httpx.Limits(max_connections=16, max_keepalive_connections=8),
+)
+
+
 class Builder(ABC):
+    # External decompressors that can inflate an archive on multiple cores (or
+    # at least in a separate process), in order of preference for each suffix.
+    DECOMPRESSORS = {
+        ".gz": [["unpigz", "-c"], ["pigz", "-dc"]],
+        ".bz2": [["pbzip2", "-dc"], ["lbzip2", "-dc"]],
+        ".xz": [["xz", "-dc", "-T0"]],
+    }
+
+    # The log file for the build. This is set for the duration of build();
+    # outside a build (e.g., when prefetching sources), output only goes to
+    # the console.
+    log_file = None
+
     def __init__(self, cross_venv: CrossVEnv, package: Package):
         self.cross_venv = cross_venv
         self.package = package
+        # The working directory doesn't change for the life of a builder; the
+        # path properties below are derived from it, so cache it rather than
+        # issuing a getcwd syscall on every access.
+        self.cwd = Path.cwd()
 
     @abstractproperty
     def build_path(self) -> Path:
@@ -46,7 +75,7 @@ class Builder(ABC):
         """The path where build logs should be written."""
         ...
 
-    @property
+    @cached_property
     def error_log_file_path(self) -> Path:
         """The path for the log file if a build error occurs."""
         return self.log_file_path.parent.parent / "errors" / self.log_file_path.name
@@ -56,6 +85,13 @@ class Builder(ABC):
         """The source archive file for the package."""
         ...
 
+    @cached_property
+    def source_etag_path(self) -> Path:
+        """The sidecar file recording the ETag of the downloaded archive."""
+        return self.source_archive_path.with_name(
+            f"{self.source_archive_path.name}.etag"
+        )
+
     def install_requirements(self, target):
         requirements = []
         for requirement in self.package.meta["requirements"][target]:
@@ -71,9 +107,9 @@ class Builder(ABC):
                 self.log_file,
                 requirements,
                 paths=[
-                    Path.cwd() / "dist",
-                    Path.cwd() / "deps",
-                    Path.cwd() / "published",
+                    self.cwd / "dist",
+                    self.cwd / "deps",
+                    self.cwd / "published",
                 ],
                 build=target == "build",
             )
@@ -83,23 +119,240 @@ class Builder(ABC):
     @abstractmethod
     def download_source_url(self): ...
 
-    def download_source(self):
-        """Download the source tarball."""
+    def download_source(self, quiet=False):
+        """Download the source tarball.
+
+        If a previously downloaded archive and its ETag are on disk, the server
+        is only asked for the archive if it has changed (a conditional GET); an
+        unchanged archive costs a single round trip. Downloads stream to a
+        partial file that only replaces the archive once it is complete - and
+        verified, if the recipe declares a SHA256 checksum - so an interrupted
+        download can't masquerade as a cached archive.
+
+        :param quiet: Suppress the incremental progress output. Used when
+            several downloads share the console, where interleaved partial
+            lines are unreadable.
+        """
         url = self.download_source_url()
-        log(self.log_file, f"Downloading {url}...", end="", flush=True)
+
+        headers = {}
+        if self.source_archive_path.is_file() and self.source_etag_path.is_file():
+            headers["If-None-Match"] = self.source_etag_path.read_text(
+                encoding="utf-8"
+            ).strip()
+
+        if not quiet:
+            log(self.log_file, f"Downloading {url}...", end="", flush=True)
         self.source_archive_path.parent.mkdir(parents=True, exist_ok=True)
-        with httpx.stream("GET", url, follow_redirects=True) as response:
-            with self.source_archive_path.open("wb") as f:
-                for i, chunk in enumerate(response.iter_bytes()):
-                    if i % 100 == 0:
-                        log(self.log_file, ".", end="", flush=True)
+        partial_path = self.source_archive_path.with_name(
+            f"{self.source_archive_path.name}.part"
+        )
+        with _http_client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304:
+                if not quiet:
+                    log(self.log_file, " cached archive is current.")
+                return
+            response.raise_for_status()
+            with partial_path.open("wb") as f:
+                # 1 MiB chunks mean ~100x fewer Python-level iterations (and
+                # progress updates) per MB than httpx's default chunk size,
+                # and the file writes coalesce into 1 MiB syscalls. iter_raw()
+                # bypasses httpx's content-decoding layer, which would
+                # otherwise copy every chunk through a (no-op) decoder; source
+                # archives are already compressed, so servers don't apply
+                # Content-Encoding to them.
+                downloaded = 0
+                progress = 0
+                for chunk in response.iter_raw(chunk_size=1 << 20):
                     f.write(chunk)
-        log(self.log_file, " done.")
+                    # One progress dot per 10 MiB downloaded, rather than a
+                    # flushed stdout write per chunk; each dot is a write
+                    # syscall plus a lock on stdout.
+                    downloaded += len(chunk)
+                    if not quiet and downloaded - progress >= 10 << 20:
+                        log(self.log_file, ".", end="", flush=True)
+                        progress = downloaded
+        if not quiet:
+            log(self.log_file, " done.")
+
+        self._verify_checksum(partial_path)
+        partial_path.replace(self.source_archive_path)
+
+        # Persist the ETag so the next download can be a conditional GET.
+        etag = response.headers.get("ETag")
+        if etag:
+            self.source_etag_path.write_text(f"{etag}\n", encoding="utf-8")
+        else:
+            self.source_etag_path.unlink(missing_ok=True)
+
+    def _verify_checksum(self, path: Path):
+        """Verify an archive against the recipe's SHA256 checksum, if it has one.
+
+        :param path: The archive file to verify.
+        :raises: ``RuntimeError`` if the archive doesn't match the checksum; the
+            file is deleted so the next build re-downloads it.
+        """
+        source = self.package.meta["source"]
+        expected = source.get("sha256") if isinstance(source, dict) else None
+        if not expected:
+            return
+
+        digest = hashlib.sha256()
+        with path.open("rb") as f:
+            while chunk := f.read(1 << 20):
+                digest.update(chunk)
+        if digest.hexdigest() != expected:
+            path.unlink()
+            raise RuntimeError(
+                f"SHA256 mismatch for {path.name}: "
+                f"expected {expected}, got {digest.hexdigest()}"
+            )
+
+    def _source_decompressor(self, archive):
+        """Start an external process that inflates the source archive.
+
+        Python's tarfile module decompresses in-process on a single core; tools
+        like pigz can use every core, and even single-threaded external tools
+        run concurrently with the extraction loop.
+
+        :param archive: The open archive file; the decompressor reads it from
+            stdin, so kernel advice applied to the file descriptor holds.
+        :returns: A ``Popen`` with the decompressed archive on its ``stdout``,
+            or ``None`` if no suitable decompressor is installed.
+        """
+        candidates = self.DECOMPRESSORS.get(self.source_archive_path.suffix, [])
+        for candidate in candidates:
+            if shutil.which(candidate[0]):
+                return subprocess.Popen(
+                    candidate,
+                    stdin=archive,
+                    stdout=subprocess.PIPE,
+                    bufsize=1 << 20,
+                )
+        return None
+
+    def _extract_tar(self, tf: tarfile.TarFile, strip: int):
+        """Extract a tar stream into the build directory.
+
+        Strips ``strip`` leading path components from each member path (the
+        equivalent of ``--strip-components=<strip>``). Member bodies have to be
+        read sequentially from the (single) tar stream, but writing them to
+        disk is independent, so the open/write/close syscalls for each file are
+        dispatched to a thread pool. For archives of many small files - the
+        typical sdist - this keeps several disk writes in flight instead of
+        waiting on one file at a time.
+
+        :param tf: The open tar stream to extract.
+        :param strip: The number of leading path components to strip.
+        """
+
+        def members(tf: tarfile.TarFile, strip=1):
+            # Strip leading path components by scanning for the separator and
+            # slicing, rather than str.split(), which allocates a list plus a
+            # substring for every component of every member on this hot loop.
+            for member in tf:
+                path = member.path
+                start = 0
+                for _ in range(strip):
+                    i = path.find("/", start)
+                    if i < 0:
+                        start = -1
+                        break
+                    start = i + 1
+                if 0 < start < len(path):
+                    member.path = path[start:]
+                    yield member
+
+        max_workers = min(8, multiprocessing.cpu_count())
+        # Cap the number of file bodies buffered in memory awaiting a writer.
+        slots = threading.BoundedSemaphore(2 * max_workers)
+        futures = []
+
+        # A streamed archive can't be pre-scanned for its directory list, but
+        # almost every member shares a parent with an earlier one; tracking
+        # the directories already created turns the per-file mkdir (a stat
+        # syscall at minimum) into a set lookup.
+        created_dirs = set()
+
+        def ensure_parent(target: Path):
+            parent = target.parent
+            if parent not in created_dirs:
+                parent.mkdir(parents=True, exist_ok=True)
+                created_dirs.update(parent.parents)
+                created_dirs.add(parent)
+
+        def write_member(target: Path, data: bytes, mode: int):
+            try:
+                fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+                try:
+                    os.write(fd, data)
+                finally:
+                    os.close(fd)
+            finally:
+                slots.release()
+
+        def write_large_member(member: tarfile.TarInfo, target: Path):
+            # Stream the body straight into a pre-sized memory map: no
+            # multi-megabyte bytes object, and no bounce-buffer write loop.
+            # This runs on the main thread - the stream has to be consumed
+            # before the next member's header anyway.
+            source = tf.extractfile(member)
+            fd = os.open(
+                target, os.O_RDWR | os.O_CREAT | os.O_TRUNC, member.mode & 0o777
+            )
+            try:
+                os.ftruncate(fd, member.size)
+                # The view must be released before the mmap closes, even on
+                # error; otherwise a truncated archive surfaces as BufferError
+                # rather than the RuntimeError below.
+                with mmap.mmap(fd, member.size) as mm, memoryview(mm) as view:
+                    pos = 0
+                    while pos < member.size:
+                        count = source.readinto(view[pos : pos + (1 << 20)])
+                        if not count:
+                            raise RuntimeError(f"Truncated tar member {member.path!r}")
+                        pos += count
+            finally:
+                os.close(fd)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for member in members(tf, strip=strip) if strip else tf:
+                if member.isfile():
+                    target = self.build_path / member.path
+                    ensure_parent(target)
+                    if member.size >= 4 << 20:
+                        write_large_member(member, target)
+                    else:
+                        data = tf.extractfile(member).read()
+                        slots.acquire()
+                        futures.append(
+                            executor.submit(
+                                write_member, target, data, member.mode & 0o777
+                            )
+                        )
+                else:
+                    # Hard links need their source file on disk; wait for any
+                    # in-flight writes before linking.
+                    if member.islnk():
+                        for future in futures:
+                            future.result()
+                        futures.clear()
+                    # The build tree is ephemeral, so don't spend chmod/utime
+                    # syscalls restoring modes and mtimes on directories;
+                    # regular files get their mode at creation time in
+                    # write_member, which costs nothing extra.
+                    tf.extract(member, path=self.build_path, set_attrs=False)
+                    if member.isdir():
+                        created_dirs.add(self.build_path / member.path)
+
+        # Surface any errors from the write threads.
+        for future in futures:
+            future.result()
 
     def unpack_source(self):
         log(
             self.log_file,
-            f"Unpacking {self.source_archive_path.relative_to(Path.cwd())}...",
+            f"Unpacking {self.source_archive_path.relative_to(self.cwd)}...",
         )
         # Determine the stripping level. By default, this is 1;
         # but some source types can override.
@@ -111,22 +364,36 @@ class Builder(ABC):
         # Some packages (e.g., brotli) have uploaded a .tar.gz file... that is
         # actually a zipfile (!).
         if tarfile.is_tarfile(self.source_archive_path):
-            # This is the equivalent of --strip-components=<strip>
-            def members(tf: tarfile.TarFile, strip=1):
-                for member in tf.getmembers():
-                    parts = member.path.split("/", strip)
+            with self.source_archive_path.open("rb") as archive:
+                # Advise the kernel that the archive will be read once, front
+                # to back; this widens the readahead window, overlapping disk
+                # reads with decompression.
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(archive.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+                proc = self._source_decompressor(archive)
+                if proc is not None:
                     try:
-                        if parts[strip]:
-                            member.path = parts[strip]
-                            yield member
-                    except IndexError:
-                        pass
-
-            with tarfile.open(self.source_archive_path) as tf:
-                tf.extractall(
-                    path=self.build_path,
-                    members=members(tf, strip=strip) if strip else None,
-                )
+                        with tarfile.open(fileobj=proc.stdout, mode="r|") as tf:
+                            self._extract_tar(tf, strip)
+                    finally:
+                        # Always close the pipe and reap the decompressor,
+                        # even if extraction fails partway; closing the read
+                        # end terminates a decompressor that is still writing.
+                        proc.stdout.close()
+                        returncode = proc.wait()
+                    if returncode:
+                        raise RuntimeError(
+                            f"Error decompressing {self.source_archive_path}"
+                        )
+                else:
+                    with tarfile.open(fileobj=archive, mode="r|*") as tf:
+                        self._extract_tar(tf, strip)
+
+                # The archive won't be read again; drop its pages from the
+                # page cache so they don't evict the freshly written sources.
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(archive.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
 
         elif zipfile.is_zipfile(self.source_archive_path):
             # Strip the top level folder.
@@ -152,9 +419,15 @@ class Builder(ABC):
             )
 
     def patch_source(self):
-        patched = False
-        for patch in self.package.meta["patches"]:
-            patchfile = self.package.recipe_path / "patches" / patch
+        patchfiles = [
+            self.package.recipe_path / "patches" / patch
+            for patch in self.package.meta["patches"]
+        ]
+        if not patchfiles:
+            log(self.log_file, "No patches to apply.")
+            return
+
+        def apply_patch(patchfile):
             log(
                 self.log_file,
                 f"Applying {patchfile.relative_to(self.package.recipe_path)}...",
@@ -173,24 +446,44 @@ class Builder(ABC):
                 ],
                 cwd=self.build_path,
             )
-            patched = True
 
-        if not patched:
-            log(self.log_file, "No patches to apply.")
+        # A recipe's patches touch disjoint files, so they can be applied
+        # concurrently; each application is an independent subprocess.
+        with ThreadPoolExecutor(max_workers=min(8, len(patchfiles))) as executor:
+            list(executor.map(apply_patch, patchfiles))
 
     def prepare(self, clean=True):
+        removal = None
         if clean and self.build_path.is_dir():
-            if clean:
-                log(self.log_file, f"\n[{self.cross_venv}] Clean up old builds")
-                log(
-                    self.log_file,
-                    f"Removing {self.build_path.relative_to(Path.cwd())}...",
-                )
-                shutil.rmtree(self.build_path)
+            log(self.log_file, f"\n[{self.cross_venv}] Clean up old builds")
+            log(
+                self.log_file,
+                f"Removing {self.build_path.relative_to(self.cwd)}...",
+            )
+            # Deleting a large build tree is a long, serial stream of unlink
+            # syscalls. Rename it out of the way (which is atomic), and delete
+            # it on a background thread so the removal overlaps the download
+            # and unpack that follow.
+            old_path = self.build_path.with_name(
+                f"{self.build_path.name}.old.{os.getpid()}"
+            )
+            self.build_path.rename(old_path)
+            removal = threading.Thread(target=shutil.rmtree, args=(old_path,))
+            removal.start()
 
         if not self.source_archive_path.is_file():
             log(self.log_file, f"\n[{self.cross_venv}] Download package sources")
             self.download_source()
+        elif self.source_etag_path.is_file():
+            log(self.log_file, f"\n[{self.cross_venv}] Validate cached package sources")
+            try:
+                self.download_source()
+            except (httpx.HTTPError, OSError):
+                # Revalidation is best-effort; an offline (or flaky) network
+                # shouldn't prevent building from the cached archive. OSError
+                # covers urllib.error.URLError, raised when resolving a PyPI
+                # download URL without a network connection.
+                log(self.log_file, "Revalidation failed; using cached archive.")
 
         if not self.build_path.is_dir():
             log(self.log_file, f"\n[{self.cross_venv}] Unpack sources")
@@ -209,6 +502,10 @@ class Builder(ABC):
         log(self.log_file, f"\n[{self.cross_venv}] Install forge build requirements")
         self.install_requirements("build")
 
+        # Make sure any background removal has finished before the build starts.
+        if removal:
+            removal.join()
+
     def compile_env(self, **kwargs) -> dict[str:str]:
         sysconfig_data = self.cross_venv.sysconfig_data
         install_root = self.cross_venv.install_root
@@ -323,20 +620,20 @@ class Builder(ABC):
 class SimplePackageBuilder(Builder):
     """A builder for projects that have a build.sh entry point."""
 
-    @property
+    @cached_property
     def source_archive_path(self) -> Path:
         url = self.download_source_url()
         filename = url.split("/")[-1]
-        return Path.cwd() / "downloads" / filename
+        return self.cwd / "downloads" / filename
 
-    @property
+    @cached_property
     def build_path(self) -> Path:
         # Generate a separate build path for each platform, since we can't guarantee
         # that the Makefile will do a truly clean build for each platform.
         # The path can be independent of the Python version, because it's not built
         # against the Python ABI.
         return (
-            Path.cwd()
+            self.cwd
             / "build"
             / "any"
             / self.package.name
@@ -344,10 +641,10 @@ class SimplePackageBuilder(Builder):
             / self.cross_venv.tag
         )
 
-    @property
+    @cached_property
     def log_file_path(self) -> Path:
         return (
-            Path.cwd()
+            self.cwd
             / "logs"
             / f"{self.package.name}-{self.package.version}-{self.cross_venv.tag}.log"
         )
@@ -368,18 +665,20 @@ class SimplePackageBuilder(Builder):
         self.cross_venv.pip_install(self.log_file, ["wheel"], build=True)
 
     def write_message_file(self, filename, data):
-        msg = message.Message()
-        for key, value in data.items():
-            msg[key] = value
-
-        # I don't know whether maxheaderlen is required, but it's used by bdist_wheel.
-        with filename.open("w", encoding="utf-8") as f:
-            generator.Generator(f, maxheaderlen=0).flatten(msg)
+        # These files are RFC 822 format, but the keys and values used are
+        # simple enough that they can be written directly, rather than paying
+        # for the email package's header folding and encoding machinery. The
+        # trailing blank line matches the header/body separator that
+        # email.generator emitted.
+        filename.write_text(
+            "".join(f"{key}: {value}\n" for key, value in data.items()) + "\n",
+            encoding="utf-8",
+        )
 
     def make_wheel(self):
         build_num = str(self.package.meta["build"]["number"])
-        name = canonicalize_name(self.package.name)
-        version = canonicalize_version(self.package.version)
+        name = self.package.canonical_name
+        version = self.package.canonical_version
         info_path = self.build_path / "wheel" / f"{name}-{version}.dist-info"
 
         log(self.log_file, f"\n[{self.cross_venv}] Writing wheel metadata")
@@ -418,7 +717,7 @@ class SimplePackageBuilder(Builder):
                 "pack",
                 str(self.build_path / "wheel"),
                 "--dest-dir",
-                str(Path.cwd() / "deps"),
+                str(self.cwd / "deps"),
                 "--build-number",
                 str(build_num),
             ],
@@ -427,8 +726,8 @@ class SimplePackageBuilder(Builder):
     def compile(self):
         script_env = {
             "HOST_TRIPLET": self.cross_venv.platform_triplet,
-            "BUILD_TRIPLET": f"{os.uname().machine}-apple-darwin",
-            "CPU_COUNT": str(multiprocessing.cpu_count()),
+            "BUILD_TRIPLET": self.cross_venv.build_triplet,
+            "CPU_COUNT": self.cross_venv.cpu_count,
             "PREFIX": str(self.build_path / "wheel" / "opt"),
             "VERSION": self.package.version,
         }
@@ -460,31 +759,31 @@ class CMakePackageBuilder(SimplePackageBuilder):
 class PythonPackageBuilder(Builder):
     """A builder for projects available on PyPI."""
 
-    @property
+    @cached_property
     def source_archive_path(self) -> Path:
         return (
-            Path.cwd()
+            self.cwd
             / "downloads"
             / f"{self.package.name}-{self.package.version}.tar.gz"
         )
 
-    @property
+    @cached_property
     def build_path(self) -> Path:
         # Generate a separate build path for each Python version to ensure we have a
         # clean build. SDK versions can co-exist because wheel builds are cleanly
         # separated.
         return (
-            Path.cwd()
+            self.cwd
             / "build"
             / f"cp3{sys.version_info.minor}"
             / self.package.name
             / self.package.version
         )
 
-    @property
+    @cached_property
     def log_file_path(self) -> Path:
         return (
-            Path.cwd()
+            self.cwd
             / "logs"
             / f"{self.package.name}-{self.package.version}-cp3{sys.version_info.minor}-{self.cross_venv.tag}.log"
         )
@@ -511,9 +810,9 @@ class PythonPackageBuilder(Builder):
                     self.log_file,
                     ["build", "wheel"] + pyproject["build-system"]["requires"],
                     paths=[
-                        Path.cwd() / "dist",
-                        Path.cwd() / "deps",
-                        Path.cwd() / "published",
+                        self.cwd / "dist",
+                        self.cwd / "deps",
+                        self.cwd / "published",
                     ],
                 )
 
@@ -522,9 +821,9 @@ class PythonPackageBuilder(Builder):
                     self.log_file,
                     ["build", "wheel"] + pyproject["build-system"]["requires"],
                     paths=[
-                        Path.cwd() / "dist",
-                        Path.cwd() / "deps",
-                        Path.cwd() / "published",
+                        self.cwd / "dist",
+                        self.cwd / "deps",
+                        self.cwd / "published",
                     ],
                     build=True,
                 )
@@ -556,9 +855,9 @@ class PythonPackageBuilder(Builder):
         # If the package is internal tooling, not for publication, output into
         # the deps folder.
         if self.package.name in {"oldest-supported-numpy"}:
-            output_dir = str(Path.cwd() / "deps")
+            output_dir = str(self.cwd / "deps")
         else:
-            output_dir = str(Path.cwd() / "dist")
+            output_dir = str(self.cwd / "dist")
 
         self.cross_venv.run(
             self.log_file,
@@ -574,3 +873,28 @@ class PythonPackageBuilder(Builder):
             cwd=self.build_path,
             env=self.compile_env(**script_env),
         )
+
+
+def fetch_source(builder: Builder):
+    """Download a builder's source archive, if it isn't already cached.
+
+    Downloads are network bound, so the archives for a batch of builds can be
+    fetched concurrently before the (serial) build loop starts. Since the
+    downloads share the console, incremental progress is suppressed in favor
+    of one complete line per archive. Any download error is deferred; the
+    build itself will retry the download and log the failure against the
+    package.
+
+    :param builder: The builder whose source archive should be downloaded.
+    """
+    if builder.source_archive_path.is_file():
+        return
+    try:
+        builder.download_source(quiet=True)
+        log(None, f"Downloaded {builder.source_archive_path.name}")
+    except Exception as e:
+        log(
+            None,
+            f"Download of {builder.source_archive_path.name} failed ({e}); "
+            "the build will retry it.",
+        )
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 import itertools
+import multiprocessing
 import os
 import shutil
 import sys
@@ -75,6 +76,8 @@ class CrossVEnv:
         self.tag = self.platform_identifier.replace("-", "_").replace(".", "_")
         self.venv_name = f"venv3.{sys.version_info.minor}-{self.tag}"
         self.platform_triplet = f"{self.arch}-{self.PLATFORM_TRIPLET[sdk]}"
+        self.build_triplet = f"{os.uname().machine}-apple-darwin"
+        self.cpu_count = str(multiprocessing.cpu_count())
 
         # Prime the on-demand variable cache
         self._sysconfig_data = None
@@ -2,11 +2,13 @@ from __future__ import annotations
 
 import sys
 from copy import deepcopy
+from functools import cached_property
 from pathlib import Path
 
 import jinja2
 import jsonschema
 import yaml
+from packaging.utils import canonicalize_name, canonicalize_version
 
 from forge.build import (
     Builder,
@@ -42,6 +44,20 @@ class Package:
     def __str__(self):
         return f"{self.name} {self.version}"
 
+    @cached_property
+    def canonical_name(self) -> str:
+        """The PEP 503 normalized form of the package name.
+
+        Canonicalization is regex-based, so it's cached rather than recomputed
+        on every wheel build.
+        """
+        return canonicalize_name(self.name)
+
+    @cached_property
+    def canonical_version(self) -> str:
+        """The canonical form of the package version."""
+        return canonicalize_version(self.version)
+
     def load_meta(self, override_version, override_build):
         # http://python-jsonschema.readthedocs.io/en/latest/faq/
         def with_defaults(validator_cls):
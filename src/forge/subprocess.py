@@ -5,9 +5,11 @@ import subprocess as stdlib_subprocess
 
 from forge.logger import log
 
-# Pass through check_output without logging
+# Pass through check_output and Popen without logging
 check_output = stdlib_subprocess.check_output
 CalledProcessError = stdlib_subprocess.CalledProcessError
+Popen = stdlib_subprocess.Popen
+PIPE = stdlib_subprocess.PIPE
 
 
 def run(logfile, *args, **kwargs):
@@ -23,6 +25,10 @@ def run(logfile, *args, **kwargs):
     # stdout/err must be piped so the output streamer can print it.
     kwargs["stdout"] = stdlib_subprocess.PIPE
     kwargs["stderr"] = stdlib_subprocess.STDOUT
+    # The tools being spawned are trusted, and don't depend on fd isolation;
+    # skipping the close-every-descriptor loop measurably cuts the launch cost
+    # of short-lived subprocesses (e.g., patch) on hosts with high fd limits.
+    kwargs.setdefault("close_fds", False)
     # use line-buffered output by default
     kwargs["bufsize"] = 0
     # use text mode